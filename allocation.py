@@ -0,0 +1,51 @@
+# allocation.py
+#
+# Allocation logic shared by the API (main.py) and the offline simulator.
+
+PRIORITY_SCORES = {
+    "P1": 10000,
+    "P2": 400,
+    "P3": 300,
+    "P4": 200,
+    "P5": 100,
+}
+
+
+def get_priority_score(priority: str):
+    return PRIORITY_SCORES.get(priority, 0)
+
+
+def effective_score(priority, created, now):
+    waiting_minutes = (now - created).total_seconds() / 60
+    return get_priority_score(priority) + waiting_minutes
+
+
+# Model inputs, in the export's column names. train_model.py trains on
+# exactly these, so training, validation and live prediction agree.
+FEATURES = [
+    "Task Type",
+    "Resource Allocated",
+    "hour",
+    "day_of_week",
+    "is_afternoon"
+]
+
+
+def build_features(resource_code, when, storage_type):
+    return {
+        "Task Type": storage_type,
+        "Resource Allocated": resource_code,
+        "hour": when.hour,
+        "day_of_week": when.weekday(),
+        "is_afternoon": 1 if when.hour >= 13 else 0
+    }
+
+
+def predict_duration(model, columns, resource_code, when, storage_type):
+    # Imported here so tools that only need the scoring helpers stay light
+    import pandas as pd
+
+    data = pd.DataFrame([build_features(resource_code, when, storage_type)])
+    data = pd.get_dummies(data)
+    data = data.reindex(columns=columns, fill_value=0)
+    return model.predict(data)[0]
@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+#
+# Multi-worker launch: WEB_CONCURRENCY=4 ./start.sh
+#
+# The app is imported once in the master (preload_app), which also loads
+# the model and sets up the database before forking, so workers share
+# the model pages copy-on-write and never race to seed. The master also
+# starts the single retraining scheduler; workers only reload its output.
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    import main
+    import retrain
+
+    main.preload()
+    server.retrain_scheduler = retrain.start_scheduler()
+
+
+def on_exit(server):
+    scheduler = getattr(server, "retrain_scheduler", None)
+    if scheduler:
+        scheduler.terminate()
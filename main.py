@@ -1,18 +1,36 @@
 from fastapi import FastAPI
 from database import engine, Base, SessionLocal
 from models import * # ensures all tables are registered
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 import random
-import joblib
-import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from seed_data import seed_database
 from utils import generate_task_no
+from allocation import predict_duration, effective_score
+from waves import build_waves, generate_wave_no, walk_order, ST_TO_RT
 from sqlalchemy import func, case
-ml_model = None
-model_columns = None
+import asyncio
+import fcntl
+import gc
+import os
+import time
+import retrain
+from migrations import migrate
+import worker_stats
+
+# (model, columns, model file mtime), swapped as one object on reload
+model_state = None
+
+SETUP_LOCK = "/tmp/warehouse-setup.lock"
+
+# Process age when this worker finished startup and could serve requests
+ready_seconds = None
+
+# Memory is logged once, after the first request has been handled
+memory_logged = False
 
 
 # ---------- LIFESPAN (Render safe startup) ----------
@@ -20,22 +38,106 @@ from seed_data import seed_database
 from models import *  # ensures SQLAlchemy registers all tables
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    global ml_model, model_columns
+def load_model(retries=0):
+    """Load the model artifacts and swap them in; False if they never matched."""
+    global model_state
+
+    # joblib pulls in scikit-learn when unpickling; only pay for it here
+    import joblib
+
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(0.5)
+
+        mtime = os.path.getmtime(retrain.MODEL_PATH)
+        model = joblib.load(retrain.MODEL_PATH)
+        columns = joblib.load(retrain.COLUMNS_PATH)
+
+        # Artifacts are replaced one after the other; skip a torn pair
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and list(names) != list(columns):
+            continue
+
+        model_state = (model, columns, mtime)
+        return True
 
-    ml_model = joblib.load("task_time_model.pkl")
-    model_columns = joblib.load("model_columns.pkl")
+    return False
 
-    Base.metadata.create_all(bind=engine)
 
+def require_model():
+    """Startup must not continue without a model; predict_time needs one."""
+    if not load_model(retries=10):
+        raise RuntimeError(
+            f"{retrain.MODEL_PATH} and {retrain.COLUMNS_PATH} do not match"
+        )
+
+
+async def model_watch_loop():
+    # Retraining runs in the scheduler process; workers only pick up results
+    while True:
+        await asyncio.sleep(retrain.MODEL_POLL_SECONDS)
+        if os.path.getmtime(retrain.MODEL_PATH) != model_state[2]:
+            await asyncio.to_thread(load_model)
+
+
+def setup_database():
+    """Create, migrate and seed the schema once, serialized across workers."""
+    if os.environ.get("WAREHOUSE_DB_READY") == "1":
+        return
+
+    with open(SETUP_LOCK, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
 
+        Base.metadata.create_all(bind=engine)
+        migrate(engine)
+        seed_database()
 
-    seed_database()
+    # Inherited by forked workers, so they skip setup entirely
+    os.environ["WAREHOUSE_DB_READY"] = "1"
     print("✅ Tables created, sequence created, DB seeded")
 
+
+def preload():
+    """
+    Run in the gunicorn master before workers are forked (gunicorn.conf.py).
+    Workers then share the model pages copy-on-write.
+    """
+    import pandas  # noqa: F401  used by predict_duration
+
+    require_model()
+    setup_database()
+
+    # Don't hand pooled SQLite connections to the children
+    engine.dispose()
+
+    # Keep the GC from touching (and so copying) the preloaded objects
+    gc.freeze()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if model_state is None:
+        require_model()
+
+    setup_database()
+
+    # Under gunicorn the master already started the scheduler
+    scheduler = None
+    if os.environ.get("WAREHOUSE_RETRAIN_SCHEDULER") != "1":
+        scheduler = retrain.start_scheduler()
+
+    watch_task = asyncio.create_task(model_watch_loop())
+
+    global ready_seconds
+    ready_seconds = worker_stats.process_age_seconds()
+    print(f"Worker {os.getpid()}: ready to serve {ready_seconds}s after start")
+
     yield
 
+    watch_task.cancel()
+    if scheduler:
+        scheduler.terminate()
+
 
 
 
@@ -59,6 +161,31 @@ async def options_handler(request: Request, full_path: str):
     return {}
 
 
+@app.middleware("http")
+async def log_worker_memory(request: Request, call_next):
+    global memory_logged
+
+    response = await call_next(request)
+
+    if not memory_logged:
+        memory_logged = True
+        memory = worker_stats.memory_kb()
+        print(f"Worker {os.getpid()}: ready after {ready_seconds}s, "
+              f"RSS {memory['rss_kb']} kB, PSS {memory['pss_kb']} kB")
+
+    return response
+
+
+@app.get("/worker_stats")
+def get_worker_stats():
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": worker_stats.process_age_seconds(),
+        "ready_seconds": ready_seconds,
+        **worker_stats.memory_kb()
+    }
+
+
 # ---------- Helpers ----------
 def get_next_order_no(db):
     last = db.query(Order).order_by(Order.id.desc()).first()
@@ -75,31 +202,11 @@ def get_next_pallet_no(db):
     return str(int(last.pallet_hu) + 1)
 
 
-def predict_time(resource_code):
-    now = datetime.now()
-    data = pd.DataFrame([{
-        "Warehouse Task": "WT01",
-        "Task Type": "Picking",
-        "Resource Allocated": resource_code,
-        "hour": now.hour,
-        "day_of_week": now.weekday(),
-        "is_afternoon": 1 if now.hour >= 13 else 0
-    }])
-
-    data = pd.get_dummies(data)
-    data = data.reindex(columns=model_columns, fill_value=0)
-    return ml_model.predict(data)[0]
+def predict_time(resource_code, storage_type):
+    model, columns, _ = model_state
+    return predict_duration(model, columns, resource_code, datetime.now(), storage_type)
 
 
-def get_priority_score(priority: str):
-    return {
-        "P1": 10000,
-        "P2": 400,
-        "P3": 300,
-        "P4": 200,
-        "P5": 100,
-    }.get(priority, 0)
-
 @app.get("/orders")
 def get_orders():
     db = SessionLocal()
@@ -181,13 +288,14 @@ def create_order(req: OrderRequest):
     db = SessionLocal()
     try:
         order_no = get_next_order_no(db)
-        now = datetime.now()
+        now = datetime.now().replace(microsecond=0)
 
         order = Order(
             order_no=order_no,
             priority=req.priority,
             created_date=now.strftime("%d-%m-%Y"),
             created_time=now.strftime("%H:%M:%S"),
+            created_at=now,
             status="OPEN"
         )
         db.add(order)
@@ -214,6 +322,7 @@ def create_order(req: OrderRequest):
                 source_qty=qty,
                 created_date=now.strftime("%d-%m-%Y"),
                 created_time=now.strftime("%H:%M:%S"),
+                created_at=now,
                 pallet_hu=pallet_no,
                 source_bin=product.source_bin,
                 dest_bin={
@@ -247,8 +356,6 @@ def create_order(req: OrderRequest):
 def allocate_tasks():
     db = SessionLocal()
     try:
-        from datetime import datetime
-
         open_tasks = (
             db.query(Task, Order)
             .join(Order, Task.order_no == Order.order_no)
@@ -256,25 +363,23 @@ def allocate_tasks():
             .all()
         )
 
-        def effective_score(task, order):
-            created = datetime.strptime(
-                order.created_date + " " + order.created_time,
-                "%d-%m-%Y %H:%M:%S"
-            )
-            waiting_minutes = (datetime.now() - created).total_seconds() / 60
-            return get_priority_score(order.priority) + waiting_minutes
+        now = datetime.now().replace(microsecond=0)
+
+        def score(task, order):
+            return effective_score(order.priority, order.created_at, now)
 
         # Sort tasks by dynamic priority
-        open_tasks.sort(key=lambda x: effective_score(x[0], x[1]), reverse=True)
+        open_tasks.sort(key=lambda x: score(x[0], x[1]), reverse=True)
 
         # Keep only tasks after sorting
         open_tasks = [t[0] for t in open_tasks]
 
 
-        st_to_rt = {"ST01": "RT01", "ST02": "RT02", "ST03": "RT03"}
+        # Group tasks from the same area into multi-task trips
+        waves = build_waves(open_tasks)
 
-        for task in open_tasks:
-            required_rt = st_to_rt[task.storage_type]
+        for wave in waves:
+            required_rt = ST_TO_RT[wave[0].storage_type]
 
             resources = db.query(Resource).filter(
                 Resource.resource_type == required_rt,
@@ -284,14 +389,25 @@ def allocate_tasks():
             if not resources:
                 continue
 
-            best = min(resources, key=lambda r: predict_time(r.resource_code))
+            best = min(
+                resources,
+                key=lambda r: predict_time(r.resource_code, wave[0].storage_type)
+            )
+            wave_no = generate_wave_no(wave[0].id)
 
-            task.allocated_resource = best.resource_code
-            task.status = "ALLOCATED"
-            best.status = "Busy"
+            for task in wave:
+                task.allocated_resource = best.resource_code
+                task.allocated_date = now.strftime("%d-%m-%Y")
+                task.allocated_time = now.strftime("%H:%M:%S")
+                task.allocated_at = now
+                task.wave_no = wave_no
+                task.status = "ALLOCATED"
 
-            order = db.query(Order).filter(Order.order_no == task.order_no).first()
-            order.status = "ALLOCATED"
+                order = db.query(Order).filter(Order.order_no == task.order_no).first()
+                order.status = "ALLOCATED"
+
+            best.status = "Busy"
+            best.current_task_id = wave[0].id
 
             db.flush()
 
@@ -311,11 +427,12 @@ def confirm_task(task_id: int):
         if not task or task.status != "ALLOCATED":
             return {"error": "Task not found or not allocated"}
 
-        now = datetime.now()
+        now = datetime.now().replace(microsecond=0)
         task.status = "CONFIRMED"
         task.confirmed_by = task.allocated_resource
         task.confirmation_date = now.strftime("%d-%m-%Y")
         task.confirmation_time = now.strftime("%H:%M:%S")
+        task.confirmed_at = now
         task.destination_qty = task.source_qty
 
         bin = db.query(StorageBin).filter(StorageBin.bin_code == task.source_bin).first()
@@ -327,7 +444,48 @@ def confirm_task(task_id: int):
         resource = db.query(Resource).filter(
             Resource.resource_code == task.allocated_resource
         ).first()
-        resource.status = "Available"
+        resource.completed_count = func.coalesce(Resource.completed_count, 0) + 1
+
+        # Resource stays busy until every task in its wave is confirmed
+        next_task = None
+        if task.wave_no:
+            remaining = db.query(Task).filter(
+                Task.wave_no == task.wave_no,
+                Task.status == "ALLOCATED",
+                Task.id != task.id
+            ).all()
+            # Same order allocate_tasks used to pick the wave's first task
+            next_task = min(remaining, key=walk_order, default=None)
+
+        if next_task:
+            resource.current_task_id = next_task.id
+        else:
+            resource.current_task_id = None
+            resource.status = "Available"
+
+        # Feed the actual duration back for retraining. Tasks of a wave share
+        # allocated_at, so each one is timed from the previous confirmation
+        # on the same trip, matching the per-task times in the export.
+        if task.allocated_at:
+            started = task.allocated_at
+            if task.wave_no:
+                previous = db.query(Task.confirmed_at).filter(
+                    Task.wave_no == task.wave_no,
+                    Task.status == "CONFIRMED",
+                    Task.confirmed_at.isnot(None)
+                ).order_by(Task.confirmed_at.desc()).first()
+                if previous and previous[0] > started:
+                    started = previous[0]
+
+            db.add(TaskDuration(
+                task_id=task.id,
+                task_type=task.storage_type,
+                resource_allocated=task.allocated_resource,
+                hour=now.hour,
+                day_of_week=now.weekday(),
+                is_afternoon=1 if now.hour >= 13 else 0,
+                duration_mins=(now - started).total_seconds() / 60
+            ))
 
         pending = db.query(Task).filter(
             Task.order_no == task.order_no,
@@ -478,44 +636,48 @@ def refill_bin(bin_code: str):
 def resource_status():
     db = SessionLocal()
     try:
-        resources = db.query(Resource).all()
-        result = []
-
-        for r in resources:
-            task = db.query(Task).filter(
-                Task.allocated_resource == r.resource_code,
-                Task.status == "ALLOCATED"
-            ).first()
-
-            result.append({
-                "resource_code": r.resource_code,
-                "resource_type": r.resource_type,
-                "resource_name": r.resource_name,
-                "status": r.status,
-                "product": task.product_name if task else None,
-                "task_no": task.task_no if task else None,
-                "source_bin": task.source_bin if task else None,
-                "dest_bin": task.dest_bin if task else None,
-            })
+        rows = (
+            db.query(Resource, Task)
+            .outerjoin(Task, Task.id == Resource.current_task_id)
+            .all()
+        )
 
-        return result
+        return [{
+            "resource_code": r.resource_code,
+            "resource_type": r.resource_type,
+            "resource_name": r.resource_name,
+            "status": r.status,
+            "product": task.product_name if task else None,
+            "task_no": task.task_no if task else None,
+            "source_bin": task.source_bin if task else None,
+            "dest_bin": task.dest_bin if task else None,
+        } for r, task in rows]
     finally:
         db.close()
 
 @app.get("/resource/{code}")
-def resource_details(code: str):
+def resource_details(code: str, limit: int = 50, before_id: Optional[int] = None):
     db = SessionLocal()
     try:
-        tasks = db.query(Task).filter(
-            Task.allocated_resource == code
-        ).order_by(Task.id.desc()).all()
+        resource = db.query(Resource).filter(Resource.resource_code == code).first()
+        if not resource:
+            return {"error": "Resource not found"}
 
-        completed = len([t for t in tasks if t.status == "CONFIRMED"])
-        current_task = next((t for t in tasks if t.status == "ALLOCATED"), None)
+        current_task = (
+            db.query(Task).filter(Task.id == resource.current_task_id).first()
+            if resource.current_task_id else None
+        )
+
+        # Keyset pagination on (allocated_resource, id), newest first
+        query = db.query(Task).filter(Task.allocated_resource == code)
+        if before_id is not None:
+            query = query.filter(Task.id < before_id)
+        page_size = min(max(limit, 1), 500)
+        tasks = query.order_by(Task.id.desc()).limit(page_size).all()
 
         return {
             "resource_code": code,
-            "total_completed": completed,
+            "total_completed": resource.completed_count or 0,
             "current_task": {
                 "task_id": current_task.id,
                 "task_no": current_task.task_no,
@@ -531,7 +693,81 @@ def resource_details(code: str):
                     "qty": t.source_qty,
                     "status": t.status
                 } for t in tasks
-            ]
+            ],
+            # A short page is the last one
+            "next_before_id": tasks[-1].id if len(tasks) == page_size else None
+        }
+    finally:
+        db.close()
+
+
+# ---------- Analytics ----------
+def minutes_between(start_col, end_col):
+    return (func.julianday(end_col) - func.julianday(start_col)) * 1440
+
+
+@app.get("/analytics")
+def analytics(start: Optional[datetime] = None, end: Optional[datetime] = None):
+    end = end or datetime.now()
+    start = start or end - timedelta(hours=24)
+
+    db = SessionLocal()
+    try:
+        confirmed_in_window = (Task.confirmed_at >= start, Task.confirmed_at < end)
+
+        hour = func.strftime("%Y-%m-%d %H:00", Task.confirmed_at)
+        hourly = (
+            db.query(hour, func.count(Task.id))
+            .filter(*confirmed_in_window)
+            .group_by(hour)
+            .order_by(hour)
+            .all()
+        )
+
+        avg_to_allocate = (
+            db.query(func.avg(minutes_between(Task.created_at, Task.allocated_at)))
+            .filter(Task.allocated_at >= start, Task.allocated_at < end)
+            .scalar()
+        )
+
+        avg_to_confirm = (
+            db.query(func.avg(minutes_between(Task.allocated_at, Task.confirmed_at)))
+            .filter(*confirmed_in_window)
+            .scalar()
+        )
+
+        # Tasks of one wave share a trip, so busy time is counted per wave
+        trips = (
+            db.query(
+                Task.allocated_resource.label("resource_code"),
+                (
+                    (func.max(func.julianday(Task.confirmed_at))
+                     - func.min(func.julianday(Task.allocated_at))) * 1440
+                ).label("busy_mins")
+            )
+            .filter(*confirmed_in_window)
+            .group_by(Task.allocated_resource, func.coalesce(Task.wave_no, Task.id))
+            .subquery()
+        )
+
+        busy = (
+            db.query(trips.c.resource_code, func.sum(trips.c.busy_mins))
+            .group_by(trips.c.resource_code)
+            .order_by(trips.c.resource_code)
+            .all()
+        )
+
+        return {
+            "start": start,
+            "end": end,
+            "hourly_throughput": [
+                {"hour": h, "completed_tasks": n} for h, n in hourly
+            ],
+            "avg_time_to_allocate_mins": round(avg_to_allocate or 0, 2),
+            "avg_time_to_confirm_mins": round(avg_to_confirm or 0, 2),
+            "resource_busy_mins": {
+                code: round(mins or 0, 2) for code, mins in busy
+            }
         }
     finally:
         db.close()
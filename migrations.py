@@ -0,0 +1,88 @@
+# migrations.py
+#
+# create_all() only creates missing tables, so columns added to existing
+# tables are applied here. Safe to run on every startup.
+
+from sqlalchemy import inspect, text
+
+from database import Base
+
+# Native timestamp column -> legacy (date, time) string columns
+TIMESTAMP_BACKFILL = {
+    "orders": {
+        "created_at": ("created_date", "created_time"),
+    },
+    "tasks": {
+        "created_at": ("created_date", "created_time"),
+        "allocated_at": ("allocated_date", "allocated_time"),
+        "confirmed_at": ("confirmation_date", "confirmation_time"),
+    },
+}
+
+
+def add_missing_columns(conn):
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            col_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"
+            ))
+
+
+def create_missing_indexes(conn):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def backfill_timestamps(conn):
+    # dd-mm-YYYY + HH:MM:SS -> YYYY-mm-dd HH:MM:SS.000000 (SQLAlchemy's SQLite format)
+    for table, columns in TIMESTAMP_BACKFILL.items():
+        for target, (date_col, time_col) in columns.items():
+            conn.execute(text(f"""
+                UPDATE {table}
+                SET {target} =
+                    substr({date_col}, 7, 4) || '-' ||
+                    substr({date_col}, 4, 2) || '-' ||
+                    substr({date_col}, 1, 2) || ' ' ||
+                    {time_col} || '.000000'
+                WHERE {target} IS NULL
+                  AND {date_col} IS NOT NULL
+                  AND {time_col} IS NOT NULL
+            """))
+
+
+def backfill_resource_counters(conn):
+    conn.execute(text("""
+        UPDATE resources
+        SET completed_count = (
+            SELECT COUNT(*) FROM tasks
+            WHERE tasks.allocated_resource = resources.resource_code
+              AND tasks.status = 'CONFIRMED'
+        )
+        WHERE completed_count IS NULL
+    """))
+    conn.execute(text("""
+        UPDATE resources
+        SET current_task_id = (
+            -- waves.walk_order(): bin slot, then task id
+            SELECT id FROM tasks
+            WHERE tasks.allocated_resource = resources.resource_code
+              AND tasks.status = 'ALLOCATED'
+            ORDER BY CAST(substr(source_bin, instr(source_bin, '-') + 1) AS INTEGER), id
+            LIMIT 1
+        )
+        WHERE current_task_id IS NULL AND status = 'Busy'
+    """))
+
+
+def migrate(engine):
+    with engine.begin() as conn:
+        add_missing_columns(conn)
+        create_missing_indexes(conn)
+        backfill_timestamps(conn)
+        backfill_resource_counters(conn)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from database import Base
 
 
@@ -10,6 +10,7 @@ class Order(Base):
     priority = Column(String)
     created_date = Column(String)
     created_time = Column(String)
+    created_at = Column(DateTime, index=True)
     status = Column(String, default="OPEN")
 
 
@@ -27,6 +28,7 @@ class Task(Base):
 
     created_date = Column(String)
     created_time = Column(String)
+    created_at = Column(DateTime, index=True)
 
     status = Column(String, default="OPEN")
 
@@ -42,16 +44,42 @@ class Task(Base):
 
     # Allocation stage
     allocated_resource = Column(String, nullable=True)
+    wave_no = Column(String, nullable=True, index=True)
+    allocated_date = Column(String, nullable=True)
+    allocated_time = Column(String, nullable=True)
+    allocated_at = Column(DateTime, nullable=True, index=True)
 
     # Confirmation stage
     confirmed_by = Column(String, nullable=True)
     confirmation_date = Column(String, nullable=True)
     confirmation_time = Column(String, nullable=True)
+    confirmed_at = Column(DateTime, nullable=True, index=True)
     destination_qty = Column(Integer, nullable=True)
     source_bin = Column(String, nullable=True)
     dest_storage_type = Column(String, default="GIZN")
     dest_bin = Column(String, nullable=True)
 
+    __table_args__ = (
+        # Keyset-paginated resource history
+        Index("ix_tasks_allocated_resource_id", "allocated_resource", "id"),
+    )
+
+
+class TaskDuration(Base):
+    """Actual duration of a confirmed task, in the training feature schema."""
+    __tablename__ = "task_durations"
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, unique=True)
+
+    task_type = Column(String)           # ST01
+    resource_allocated = Column(String)  # RSG01
+    hour = Column(Integer)
+    day_of_week = Column(Integer)
+    is_afternoon = Column(Integer)
+
+    duration_mins = Column(Float)
+
 
 class Resource(Base):
     __tablename__ = "resources"
@@ -62,6 +90,10 @@ class Resource(Base):
     resource_name = Column(String)   # Reach Truck / Fast Mover / Pallet Jack
     status = Column(String)
 
+    # Denormalized, kept up to date by allocate_tasks / confirm_task
+    current_task_id = Column(Integer, nullable=True)
+    completed_count = Column(Integer, default=0)
+
 
 class Product(Base):
     __tablename__ = "products"
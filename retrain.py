@@ -0,0 +1,173 @@
+# retrain.py
+#
+# Closed-loop retraining from confirmed tasks.
+#
+# One scheduler process per host (start_scheduler(), started by the gunicorn
+# master or by a single uvicorn process) wakes up every
+# RETRAIN_INTERVAL_SECONDS and runs run() in a fresh child process, which
+# exits afterwards so the training stack never stays resident. run() only
+# writes the artifacts; every API worker notices the new model file and
+# swaps it in.
+#
+#   python retrain.py              # retrain once
+#   python retrain.py --schedule   # scheduler loop
+
+import argparse
+import fcntl
+import os
+import subprocess
+import sys
+import time
+
+from database import SessionLocal
+from models import TaskDuration
+
+# pandas, scikit-learn and train_model are imported inside the functions:
+# main.py imports this module for its settings, and the API process should
+# not pay for the training stack unless it actually retrains.
+
+MODEL_PATH = "task_time_model.pkl"
+COLUMNS_PATH = "model_columns.pkl"
+LOCK_FILE = "/tmp/warehouse-retrain.lock"
+SCHEDULER_LOCK_FILE = "/tmp/warehouse-retrain-scheduler.lock"
+
+RETRAIN_INTERVAL_SECONDS = int(os.environ.get("RETRAIN_INTERVAL_SECONDS", 3600))
+RETRAIN_ESTIMATOR = os.environ.get("RETRAIN_ESTIMATOR", "gbr")
+
+# How often API workers check the model file for a promoted model
+MODEL_POLL_SECONDS = 30
+
+MIN_FEEDBACK_ROWS = 200
+HOLDOUT_FRACTION = 0.2
+
+
+def load_feedback():
+    """Confirmed task durations as a frame in the training schema, oldest first."""
+    import pandas as pd
+    import train_model
+
+    db = SessionLocal()
+    try:
+        rows = db.query(TaskDuration).order_by(TaskDuration.id).all()
+        return pd.DataFrame([{
+            "Task Type": r.task_type,
+            "Resource Allocated": r.resource_allocated,
+            "hour": r.hour,
+            "day_of_week": r.day_of_week,
+            "is_afternoon": r.is_afternoon,
+            train_model.TARGET: r.duration_mins,
+        } for r in rows], columns=train_model.FEATURES + [train_model.TARGET])
+    finally:
+        db.close()
+
+
+def evaluate(model, columns, df):
+    import pandas as pd
+    import train_model
+    from sklearn.metrics import mean_absolute_error
+
+    # Same columns and encoding predict_duration() uses at inference time
+    X = pd.get_dummies(df[train_model.FEATURES])
+    X = X.reindex(columns=columns, fill_value=0)
+    return mean_absolute_error(df[train_model.TARGET], model.predict(X))
+
+
+def run(data=None, out_dir="."):
+    """
+    Retrain on the export plus collected feedback and promote the new model
+    if it beats the current one on the most recent feedback rows.
+    Returns True when new artifacts were written.
+    """
+    with open(LOCK_FILE, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+
+        # Only the process that holds the lock loads the training stack
+        import joblib
+        import pandas as pd
+        import train_model
+
+        data = data or train_model.DATA_FILE
+
+        feedback = load_feedback()
+        if len(feedback) < MIN_FEEDBACK_ROWS:
+            return False
+
+        split = int(len(feedback) * (1 - HOLDOUT_FRACTION))
+        history, holdout = feedback.iloc[:split], feedback.iloc[split:]
+
+        frames = [history]
+        if os.path.exists(data):
+            frames.insert(0, train_model.load_dataset(data))
+        df = pd.concat(frames, ignore_index=True)
+
+        model, columns, metrics = train_model.train(
+            df, RETRAIN_ESTIMATOR, folds=0, holdout=False
+        )
+
+        current = joblib.load(os.path.join(out_dir, MODEL_PATH))
+        current_columns = joblib.load(os.path.join(out_dir, COLUMNS_PATH))
+
+        metrics["feedback_rows"] = len(feedback)
+        metrics["holdout_mae"] = float(evaluate(model, columns, holdout))
+        metrics["current_holdout_mae"] = float(evaluate(current, current_columns, holdout))
+
+        if metrics["holdout_mae"] >= metrics["current_holdout_mae"]:
+            print(f"Retrained model not promoted: {metrics}")
+            return False
+
+        # The gate passed; refit on every row, including the holdout
+        model, columns, _ = train_model.train(
+            pd.concat([df, holdout], ignore_index=True),
+            RETRAIN_ESTIMATOR, folds=0, holdout=False
+        )
+        metrics["rows"] = len(df) + len(holdout)
+
+        train_model.save_artifacts(model, columns, metrics, out_dir)
+        print(f"✅ Retrained model promoted: {metrics}")
+        return True
+
+
+def schedule(interval=RETRAIN_INTERVAL_SECONDS):
+    """Run retraining every interval seconds, each time in a fresh process."""
+    with open(SCHEDULER_LOCK_FILE, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return  # another scheduler already runs on this host
+
+        while True:
+            time.sleep(interval)
+            result = subprocess.run([sys.executable, os.path.abspath(__file__)])
+            if result.returncode:
+                print(f"⚠️ Retraining failed with exit code {result.returncode}")
+
+
+def start_scheduler():
+    """
+    Start the scheduler as a separate, light process (it only imports the
+    database models). Sets WAREHOUSE_RETRAIN_SCHEDULER so processes forked
+    afterwards, e.g. gunicorn workers, don't start their own.
+    """
+    if RETRAIN_INTERVAL_SECONDS <= 0:
+        return None
+
+    os.environ["WAREHOUSE_RETRAIN_SCHEDULER"] = "1"
+    return subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--schedule"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the task time model")
+    parser.add_argument("--schedule", action="store_true",
+                        help="keep running and retrain every RETRAIN_INTERVAL_SECONDS")
+    args = parser.parse_args()
+
+    if args.schedule:
+        schedule()
+    else:
+        run()
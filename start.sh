@@ -1 +1,5 @@
-uvicorn main:app --host 0.0.0.0 --port 10000
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+  gunicorn -c gunicorn.conf.py main:app
+else
+  uvicorn main:app --host 0.0.0.0 --port 10000
+fi
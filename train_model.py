@@ -1,102 +1,209 @@
+# train_model.py
+#
+# Training pipeline for the task time model.
+#
+#   python train_model.py
+#   python train_model.py --estimator hgb --folds 5 --jobs 4
+#
+# The Excel export is parsed once and cached as Parquet under .cache/,
+# keyed by a hash of the source file, so retraining skips openpyxl.
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+
 # Data handling
 import pandas as pd
+import joblib
 
 # Machine learning
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.model_selection import train_test_split, cross_validate
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 
-# Visualization
-import matplotlib.pyplot as plt
-import joblib
+from allocation import FEATURES
+
+DATA_FILE = "wms_queue_output_20260201_075839_FINAL.xlsx"
+CACHE_DIR = ".cache"
+CACHE_VERSION = 2
+
+TARGET = "Task Time taken (mins)"
+
+ESTIMATORS = {
+    "gbr": lambda: GradientBoostingRegressor(
+        n_estimators=200,
+        learning_rate=0.05,
+        max_depth=3,
+        random_state=42
+    ),
+    "hgb": lambda: HistGradientBoostingRegressor(
+        max_iter=200,
+        learning_rate=0.05,
+        max_depth=3,
+        random_state=42
+    ),
+}
+
 
 # ---------------- LOAD DATA ----------------
-df = pd.read_excel("wms_queue_output_20260201_075839_FINAL.xlsx")
-
-# Clean column names
-df.columns = df.columns.str.strip()
-
-print("Columns in dataset:\n", df.columns.tolist())
-
-# ---------------- FILTER COMPLETED TASKS ----------------
-df = df[df["Task Status"] == "Completed"].copy()
-
-# ---------------- TIME FEATURES ----------------
-df["Task Completion DateTime"] = pd.to_datetime(df["Task Completion DateTime"])
-
-df["hour"] = df["Task Completion DateTime"].dt.hour
-df["day_of_week"] = df["Task Completion DateTime"].dt.dayofweek
-df["is_afternoon"] = (df["hour"] >= 13).astype(int)
-
-# ---------------- FEATURES & TARGET ----------------
-features = [
-    "Warehouse Task",
-    "Task Type",
-    "Resource Allocated",
-    "hour",
-    "day_of_week",
-    "is_afternoon"
-]
-
-target = "Task Time taken (mins)"
-
-X = df[features]
-y = df[target]
-
-# Convert text columns to numbers
-X = pd.get_dummies(X, drop_first=True)
-
-# ---------------- TRAIN TEST SPLIT ----------------
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y,
-    test_size=0.2,
-    random_state=42
-)
-
-# ---------------- MODEL ----------------
-model = GradientBoostingRegressor(
-    n_estimators=200,
-    learning_rate=0.05,
-    max_depth=3,
-    random_state=42
-)
-
-model.fit(X_train, y_train)
-
-# ---------------- EVALUATION ----------------
-predictions = model.predict(X_test)
-
-print("MAE:", mean_absolute_error(y_test, predictions))
-print("R² :", r2_score(y_test, predictions))
-
-# ---------------- FEATURE IMPORTANCE ----------------
-importances = pd.Series(
-    model.feature_importances_,
-    index=X.columns
-).sort_values(ascending=False)
-
-importances.head(10).plot(kind="bar")
-plt.title("Top Feature Importance")
-plt.show()
-
-# ---------------- SAVE MODEL ----------------
-joblib.dump(model, "task_time_model.pkl")
-print("Model saved as task_time_model.pkl")
-
-joblib.dump(X.columns.tolist(), "model_columns.pkl")
-print("Model columns saved as model_columns.pkl")
-
-# ---------------- EXAMPLE PREDICTION ----------------
-example = pd.DataFrame([{
-    "Warehouse Task": "WT01",
-    "Task Type": "Picking",
-    "Resource Allocated": "RSG02",
-    "hour": 15,
-    "day_of_week": 1,
-    "is_afternoon": 1
-}])
-
-example = pd.get_dummies(example)
-example = example.reindex(columns=X.columns, fill_value=0)
-
-print("Predicted time (mins):", model.predict(example))
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_export(path):
+    """Parse the WMS export into completed tasks with time features."""
+    df = pd.read_excel(path)
+
+    # Clean column names
+    df.columns = df.columns.str.strip()
+
+    # ---------------- FILTER COMPLETED TASKS ----------------
+    df = df[df["Task Status"] == "Completed"].copy()
+
+    # ---------------- TIME FEATURES ----------------
+    df["Task Completion DateTime"] = pd.to_datetime(df["Task Completion DateTime"])
+
+    df["hour"] = df["Task Completion DateTime"].dt.hour
+    df["day_of_week"] = df["Task Completion DateTime"].dt.dayofweek
+    df["is_afternoon"] = (df["hour"] >= 13).astype(int)
+
+    df = df[FEATURES + [TARGET]].copy()
+    df["Task Type"] = df["Task Type"].astype(str)
+    df["Resource Allocated"] = df["Resource Allocated"].astype(str)
+    return df.reset_index(drop=True)
+
+
+def load_dataset(path=DATA_FILE, cache_dir=CACHE_DIR):
+    """Return the training frame, reading the Parquet cache when it is current."""
+    digest = file_hash(path)[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}-v{CACHE_VERSION}-{digest}.parquet")
+
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    df = read_export(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    atomic_write(cache_path, lambda tmp: df.to_parquet(tmp, index=False))
+    return df
+
+
+# ---------------- SAVE ----------------
+def atomic_write(path, write):
+    """Call write(tmp_path) and move the result over path in one step."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def save_artifacts(model, columns, metrics, out_dir="."):
+    # Columns first: the API reloads when the model file changes, so the
+    # model must be the last artifact to land
+    atomic_write(os.path.join(out_dir, "model_columns.pkl"),
+                 lambda tmp: joblib.dump(columns, tmp))
+    atomic_write(os.path.join(out_dir, "task_time_model.pkl"),
+                 lambda tmp: joblib.dump(model, tmp))
+
+    def write_metrics(tmp):
+        with open(tmp, "w") as f:
+            json.dump(metrics, f, indent=2)
+
+    atomic_write(os.path.join(out_dir, "model_metrics.json"), write_metrics)
+
+
+# ---------------- TRAIN ----------------
+def prepare(df):
+    X = df[FEATURES]
+    y = df[TARGET]
+
+    # Convert text columns to numbers
+    X = pd.get_dummies(X, drop_first=True)
+    return X, y
+
+
+def train(df, estimator="gbr", folds=5, jobs=-1, holdout=True):
+    """
+    Fit the estimator and return (model, columns, metrics).
+    With holdout=False the model is fitted on the whole frame; callers such
+    as retrain.run() validate it on their own holdout.
+    """
+    X, y = prepare(df)
+
+    if holdout:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y,
+            test_size=0.2,
+            random_state=42
+        )
+    else:
+        X_train, y_train = X, y
+
+    metrics = {"estimator": estimator, "rows": len(df)}
+
+    # Folds run in parallel worker processes
+    if folds > 1:
+        cv = cross_validate(
+            ESTIMATORS[estimator](), X_train, y_train,
+            cv=folds,
+            scoring=("neg_mean_absolute_error", "r2"),
+            n_jobs=jobs
+        )
+        metrics["cv_mae"] = float(-cv["test_neg_mean_absolute_error"].mean())
+        metrics["cv_r2"] = float(cv["test_r2"].mean())
+
+    model = ESTIMATORS[estimator]()
+    model.fit(X_train, y_train)
+
+    # ---------------- EVALUATION ----------------
+    if holdout:
+        predictions = model.predict(X_test)
+        metrics["mae"] = float(mean_absolute_error(y_test, predictions))
+        metrics["r2"] = float(r2_score(y_test, predictions))
+
+    return model, X.columns.tolist(), metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the task time model")
+    parser.add_argument("--data", default=DATA_FILE)
+    parser.add_argument("--estimator", choices=sorted(ESTIMATORS), default="gbr")
+    parser.add_argument("--folds", type=int, default=5,
+                        help="cross-validation folds (0 to skip)")
+    parser.add_argument("--jobs", type=int, default=-1,
+                        help="worker processes for cross-validation")
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    df = load_dataset(args.data)
+    loaded = time.perf_counter()
+    print(f"Loaded {len(df)} completed tasks in {loaded - started:.2f}s")
+
+    model, columns, metrics = train(df, args.estimator, args.folds, args.jobs)
+    metrics["load_seconds"] = round(loaded - started, 3)
+    metrics["train_seconds"] = round(time.perf_counter() - loaded, 3)
+
+    save_artifacts(model, columns, metrics, args.out_dir)
+
+    for key, value in metrics.items():
+        print(f"{key:<14} {value}")
+    print(f"Model, columns and metrics saved to {os.path.abspath(args.out_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# waves.py
+
+# Max tasks one vehicle can carry on a single trip, per resource type
+WAVE_CAPACITY = {
+    "RT01": 4,   # Reach Truck
+    "RT02": 6,   # Fast Mover
+    "RT03": 3,   # Pallet Jack
+}
+
+# Max slot distance between the first and any other bin in a wave
+MAX_BIN_GAP = 2
+
+ST_TO_RT = {"ST01": "RT01", "ST02": "RT02", "ST03": "RT03"}
+
+
+def bin_position(bin_code):
+    """Split a bin code like ST01-0003 into (area, slot)."""
+    if not bin_code or "-" not in bin_code:
+        return bin_code, 0
+    area, slot = bin_code.rsplit("-", 1)
+    try:
+        return area, int(slot)
+    except ValueError:
+        return area, 0
+
+
+def walk_order(task):
+    """Order a truck walks the tasks of a wave: by bin slot, then task id."""
+    return bin_position(task.source_bin)[1], task.id
+
+
+def generate_wave_no(task_id: int):
+    return f"WV{90000 + task_id}"
+
+
+def build_waves(tasks, capacity=None):
+    """
+    Group tasks (already sorted by priority) into multi-task trips.
+
+    A wave is seeded by the highest priority task left and filled with
+    later tasks from the same storage type, going to the same dest bin,
+    whose source bin is within MAX_BIN_GAP slots of the seed.
+    """
+    capacity = capacity or WAVE_CAPACITY
+    waves = []
+    taken = set()
+
+    for i, seed in enumerate(tasks):
+        if i in taken:
+            continue
+        taken.add(i)
+        wave = [seed]
+
+        limit = capacity.get(ST_TO_RT.get(seed.storage_type), 1)
+        seed_area, seed_slot = bin_position(seed.source_bin)
+
+        for j in range(i + 1, len(tasks)):
+            if len(wave) >= limit:
+                break
+            if j in taken:
+                continue
+
+            t = tasks[j]
+            area, slot = bin_position(t.source_bin)
+            if (
+                t.storage_type == seed.storage_type
+                and t.dest_bin == seed.dest_bin
+                and area == seed_area
+                and abs(slot - seed_slot) <= MAX_BIN_GAP
+            ):
+                taken.add(j)
+                wave.append(t)
+
+        # Walk the aisle in slot order instead of priority order
+        wave.sort(key=walk_order)
+        waves.append(wave)
+
+    return waves
@@ -0,0 +1,39 @@
+# worker_stats.py
+#
+# Per-process memory and startup numbers for the API workers, read from
+# /proc. Values are None where /proc is not available.
+
+import os
+
+
+def _read_kb(path, field):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def memory_kb():
+    """RSS, plus PSS which splits pages shared with the master across workers."""
+    return {
+        "rss_kb": _read_kb("/proc/self/status", "VmRSS"),
+        "pss_kb": _read_kb("/proc/self/smaps_rollup", "Pss"),
+        "shared_kb": _read_kb("/proc/self/smaps_rollup", "Shared_Clean"),
+    }
+
+
+def process_age_seconds():
+    """Seconds since this process was created (fork time for workers)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime), counted after the "(comm)" field
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    return round(uptime - start_ticks / os.sysconf("SC_CLK_TCK"), 3)